@@ -11,106 +11,233 @@ that are relevant to accounting.
 
 """
 from datetime import datetime
-from sqlalchemy import event, orm, and_, update
+from itertools import chain
+from time import monotonic
+from typing import Optional
+from sqlalchemy import event, orm, and_, update, select, bindparam, Integer
+from sqlalchemy.engine import Result
 from sqlalchemy.orm.session import Session
 
 from python_accounting.models import Entity, Recyclable, Transaction, Account, Ledger
 from python_accounting.mixins import IsolatingMixin
 from python_accounting.exceptions import MissingEntityError
 
-# Internal guard to avoid double-registration of event listeners.
-_REGISTERED_SESSION_CLASSES = set()
+# Internal guard to avoid double-registration of event listeners. The flag is set on
+# registered Session classes, so subclasses such as the ones generated by sessionmaker
+# inherit it, as listeners on a base class also fire for its subclasses.
+_REGISTERED_FLAG = "_accounting_events_registered"
 
-def _filter_options(execute_state, option) -> bool:
-    return (
-        not execute_state.is_column_load
-        and not execute_state.is_relationship_load
-        and not execute_state.execution_options.get(option, False)
-        and not execute_state.session.info.get(option, False)
+# How long, in seconds, the current year is cached on a session.
+_YEAR_CACHE_SECONDS = 3600
+
+# Whether each model class defines a validate method, resolved once per class.
+_VALIDATING_CLASSES = {}
+
+# Whether each model class is scoped to the session Entity, resolved once per class.
+_ISOLATED_CLASSES = {}
+
+# The type attribute by which instances of each model class are numbered in a flush,
+# or None if they are not, resolved once per class.
+_INDEX_ATTRIBUTES = {}
+
+# The recycling criteria is the same for every query, so it is built only once.
+_RECYCLING_CRITERIA = orm.with_loader_criteria(
+    Recyclable,
+    lambda cls: and_(
+        cls.deleted_at == None,  # pylint: disable=singleton-comparison
+        cls.destroyed_at == None,  # pylint: disable=singleton-comparison
+    ),
+    include_aliases=True,
+)
+
+# The entity criteria compares against a bound parameter whose value is supplied
+# on every execution, so statements share one compiled cache entry across entities.
+_SESSION_ENTITY_ID = bindparam("session_entity_id", type_=Integer)
+_ISOLATION_CRITERIA = orm.with_loader_criteria(
+    IsolatingMixin,
+    lambda cls: cls.entity_id == _SESSION_ENTITY_ID,
+    include_aliases=True,
+)
+
+def _is_isolated(model_cls) -> bool:
+    isolated = _ISOLATED_CLASSES.get(model_cls)
+    if isolated is None:
+        isolated = _ISOLATED_CLASSES[model_cls] = issubclass(model_cls, IsolatingMixin)
+    return isolated
+
+def _needs_isolation(execute_state) -> bool:
+    # Most queries are for an isolated model, which the bind mapper tells cheaply.
+    # Otherwise every model in the results is checked, and statements without any,
+    # such as aggregates, are always isolated.
+    bind_mapper = execute_state.bind_mapper
+    if bind_mapper is not None and _is_isolated(bind_mapper.class_):
+        return True
+    mappers = execute_state.all_mappers
+    return not mappers or any(_is_isolated(mapper.class_) for mapper in mappers)
+
+def _bind_session_entity(execute_state) -> Result:
+    # invoke_statement can only merge params into an existing mapping
+    if execute_state.parameters is None:
+        execute_state.parameters = {}
+    return execute_state.invoke_statement(
+        params={"session_entity_id": execute_state.session.entity.id}
     )
 
 # Create standalone functions instead of class methods
-def _add_filtering_criteria(execute_state) -> None:
+def _add_filtering_criteria(execute_state) -> Optional[Result]:
+    # Loader criteria does not apply to column loads. ORM INSERT, UPDATE and DELETE
+    # statements are left as they are
+    if execute_state.is_column_load or not execute_state.is_select:
+        return None
+
+    # Relationship loads already carry the criteria the parent object was loaded
+    # with, which only need the session entity id bound
+    if execute_state.is_relationship_load:
+        if execute_state.session.entity is None:
+            return None
+        return _bind_session_entity(execute_state)
+
+    options = execute_state.execution_options
+    info = execute_state.session.info
+    include_deleted = options.get("include_deleted", False) or info.get(
+        "include_deleted", False
+    )
+    ignore_isolation = options.get("ignore_isolation", False) or info.get(
+        "ignore_isolation", False
+    )
+
     # Recycling filter
-    if _filter_options(execute_state, "include_deleted"):
+    if not include_deleted:
         execute_state.statement = execute_state.statement.options(
-            orm.with_loader_criteria(
-                Recyclable,
-                lambda cls: and_(
-                    cls.deleted_at == None,  # pylint: disable=singleton-comparison
-                    cls.destroyed_at  # pylint: disable=singleton-comparison
-                    == None,
-                ),
-                execute_state,
-                include_aliases=True,
-            )
+            _RECYCLING_CRITERIA
         )
 
     # Entity filter
-    if (
-        _filter_options(execute_state, "ignore_isolation")
-        and execute_state.statement.column_descriptions[0]["type"] is not Entity
-    ):
-        session_entity_id = execute_state.session.entity.id
+    if not ignore_isolation and _needs_isolation(execute_state):
         execute_state.statement = execute_state.statement.options(
-            orm.with_loader_criteria(
-                IsolatingMixin,
-                lambda cls: cls.entity_id == session_entity_id,
-                include_aliases=True,
-            )
+            _ISOLATION_CRITERIA
         )
+        return _bind_session_entity(execute_state)
+    return None
+
+def _current_year(session) -> int:
+    # The year is cached on the session and only looked up again once it is stale
+    info = session.info
+    now = monotonic()
+    if now - info.get("_current_year_at", -_YEAR_CACHE_SECONDS) >= _YEAR_CACHE_SECONDS:
+        info["_current_year"] = datetime.today().year
+        info["_current_year_at"] = now
+    return info["_current_year"]
 
 def _set_session_entity(session, object_) -> None:
-    if not hasattr(session, "entity") or session.entity is None:
+    if session.entity is None:
         if isinstance(object_, Entity):
             session.entity = object_
         elif object_.entity_id is None:
             raise MissingEntityError
         else:
-            session.entity = session.get(Entity, object_.entity_id)
+            # Use the Entity from the identity map if it is loaded and has not been
+            # recycled, avoiding a query for it
+            entity = session.identity_map.get(
+                session.identity_key(Entity, object_.entity_id)
+            )
+            if (
+                entity is None
+                or "deleted_at"
+                in orm.attributes.instance_state(entity).expired_attributes
+                or entity.deleted_at
+                or entity.destroyed_at
+            ):
+                # The reporting period is checked below, so it is loaded with the Entity
+                entity = session.scalar(
+                    select(Entity)
+                    .options(orm.joinedload(Entity.reporting_period))
+                    .where(Entity.id == object_.entity_id)
+                )
+            session.entity = entity
 
     if (
         session.entity.reporting_period is None
-        or session.entity.reporting_period.calendar_year != datetime.today().year
+        or session.entity.reporting_period.calendar_year != _current_year(session)
     ):
         session._set_reporting_period()
 
-def _set_object_index(session, object_) -> None:
-    if (isinstance(object_, (Account, Transaction))) and object_.id is None:
-        object_.session_index = (
-            len(
-                [
-                    t
-                    for t in session.new
-                    if isinstance(t, Transaction)
-                    and t.transaction_type == object_.transaction_type
-                ]
-            )
-            if isinstance(object_, Transaction)
-            else len(
-                [
-                    a
-                    for a in session.new
-                    if isinstance(a, Account)
-                    and a.account_type == object_.account_type
-                ]
+
+def _set_object_index(session, _, __) -> None:
+    # Pending Accounts and Transactions are numbered per type in the order added
+    indices = {}
+    for object_ in session.new:
+        model_cls = type(object_)
+        if model_cls not in _INDEX_ATTRIBUTES:
+            _INDEX_ATTRIBUTES[model_cls] = (
+                "transaction_type"
+                if issubclass(model_cls, Transaction)
+                else "account_type" if issubclass(model_cls, Account) else None
             )
-        )
+        attribute = _INDEX_ATTRIBUTES[model_cls]
+        if attribute is None:
+            continue
+        key = (attribute, getattr(object_, attribute))
+        object_.session_index = indices[key] = indices.get(key, 0) + 1
 
 def _validate_model(session, _, __) -> None:
-    for model in list(session.new) + list(session.dirty):
-        if hasattr(model, "validate"):
+    # session.new and session.dirty are already copies, so validators adding to
+    # the session do not affect the iteration
+    for model in chain(session.new, session.dirty):
+        model_cls = type(model)
+        validates = _VALIDATING_CLASSES.get(model_cls)
+        if validates is None:
+            validates = _VALIDATING_CLASSES[model_cls] = hasattr(model_cls, "validate")
+        if validates:
             model.validate(session)
 
+def _prepare_flush(session, flush_context, instances) -> None:
+    # Indices must be set before validation, which uses them for codes and numbers
+    _set_object_index(session, flush_context, instances)
+    _validate_model(session, flush_context, instances)
+
+def _is_registered(session_cls) -> bool:
+    return getattr(session_cls, _REGISTERED_FLAG, False)
+
 # The Ledger event handler stays at the model level but checks for accounting sessions
 @event.listens_for(Ledger, "after_insert")
 def _set_ledger_hash(mapper, connection, target):
-    # Integrity behavior: always set ledger hash after insert.
+    # Integrity behavior: always set ledger hash after insert. The hash chains to the
+    # Ledger with the preceding id, which is only known once the joined Recyclable
+    # row has been inserted, so it cannot be computed in before_insert.
+    session = orm.object_session(target)
+    if session is not None and _is_registered(type(session)):
+        # Accounting sessions write the hashes of a flush in a single statement
+        session.info.setdefault("_unhashed_ledgers", []).append(target)
+    else:
+        connection.execute(
+            update(Ledger)
+            .where(Ledger.id == target.id)
+            .values(hash=target.get_hash(connection))
+        )
+
+def _write_ledger_hashes(session, _) -> None:
+    ledgers = session.info.pop("_unhashed_ledgers", None)
+    if not ledgers:
+        return
+
+    connection = session.connection()
+    hashes = {}
+    for ledger in sorted(ledgers, key=lambda l: l.id):
+        hashes[ledger.id] = ledger.get_hash(connection, hashes.get(ledger.id - 1))
+
+    ledger_table = Ledger.__table__
     connection.execute(
-        update(Ledger)
-        .where(Ledger.id == target.id)
-        .values(hash=target.get_hash(connection))
+        update(ledger_table)
+        .where(ledger_table.c.id == bindparam("ledger_id"))
+        .values(hash=bindparam("ledger_hash")),
+        [{"ledger_id": id_, "ledger_hash": hash_} for id_, hash_ in hashes.items()],
     )
+    for ledger in ledgers:
+        orm.attributes.set_committed_value(ledger, "hash", hashes[ledger.id])
+
+def _discard_ledger_hashes(session) -> None:
+    session.info.pop("_unhashed_ledgers", None)
 
 def register_accounting_events(session_factory_or_cls):
     """
@@ -121,7 +248,8 @@ def register_accounting_events(session_factory_or_cls):
       - a sessionmaker instance (recommended), or
       - a SQLAlchemy Session subclass.
 
-    Listener registration is idempotent per Session subclass to avoid double-registration.
+    Listener registration is idempotent per Session subclass (including subclasses of
+    an already registered class) to avoid double-registration.
     """
     session_cls = getattr(session_factory_or_cls, "class_", None) or session_factory_or_cls
 
@@ -131,21 +259,22 @@ def register_accounting_events(session_factory_or_cls):
             "register_accounting_events expects a sessionmaker or a SQLAlchemy Session subclass"
         )
 
-    key = id(session_cls)
-    if key in _REGISTERED_SESSION_CLASSES:
+    if _is_registered(session_cls):
         return session_factory_or_cls
-    _REGISTERED_SESSION_CLASSES.add(key)
+    setattr(session_cls, _REGISTERED_FLAG, True)
 
     event.listen(session_cls, "do_orm_execute", _add_filtering_criteria)
     event.listen(session_cls, "transient_to_pending", _set_session_entity)
-    event.listen(session_cls, "transient_to_pending", _set_object_index)
-    event.listen(session_cls, "before_flush", _validate_model)
+    event.listen(session_cls, "before_flush", _prepare_flush)
+    event.listen(session_cls, "after_flush_postexec", _write_ledger_hashes)
+    event.listen(session_cls, "after_rollback", _discard_ledger_hashes)
     return session_factory_or_cls
 
 # Keep the class for backward compatibility, but it no longer registers global listeners
 class EventListenersMixin:
     """
     Event Listeners class - now just a placeholder for backward compatibility.
-    Global listeners are not registered anymore.
+    Global listeners are not registered anymore, and AccountingSession no longer
+    inherits from it.
     """
     pass
\ No newline at end of file
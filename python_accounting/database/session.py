@@ -15,11 +15,9 @@ from sqlalchemy.orm.session import Session
 from python_accounting.models import Entity
 from python_accounting.database.session_overrides import SessionOverridesMixin
 from python_accounting.database.accounting_functions import AccountingFunctionsMixin
-from python_accounting.database.event_listeners import EventListenersMixin, register_accounting_events
+from python_accounting.database.event_listeners import register_accounting_events
 
-class AccountingSession(
-    SessionOverridesMixin, EventListenersMixin, AccountingFunctionsMixin, Session
-):
+class AccountingSession(SessionOverridesMixin, AccountingFunctionsMixin, Session):
     """
     Custom methods specific to accounting.
 
@@ -30,6 +28,7 @@ class AccountingSession(
     entity: Entity
 
     def __init__(self, bind=None, info=None, **kwargs) -> None:
+        self.entity = None
         super().__init__(bind=bind, info=info, **kwargs)
 
 # Register event listeners at import time on the AccountingSession class.
@@ -38,9 +37,21 @@ class AccountingSession(
 # but scoped to AccountingSession only (not the base Session class) to avoid
 # interfering with non-accounting sessions in the host application.
 # The idempotency guard in register_accounting_events() prevents double-registration
-# when get_session_factory() is called later.
+# if it is called again for this class or one of its subclasses.
 register_accounting_events(AccountingSession)
 
+def _session_info(engine) -> dict:
+    options = engine.get_execution_options()
+    return {
+        "include_deleted": options.get("include_deleted", False),
+        "ignore_isolation": options.get("ignore_isolation", False),
+    }
+
+def _accounting_session_factory(**kwargs) -> sessionmaker:
+    # The listeners registered on AccountingSession above also fire for the
+    # subclass generated by sessionmaker, so nothing needs registering here
+    return sessionmaker(class_=AccountingSession, **kwargs)
+
 def get_session_factory(engine):
     """
     Create a session factory with accounting-specific event listeners.
@@ -51,17 +62,11 @@ def get_session_factory(engine):
     Returns:
         A sessionmaker that will create AccountingSession instances with proper event listeners.
     """
-    factory = sessionmaker(
-        bind=engine,
-        class_=AccountingSession,
-        info={
-            "include_deleted": engine.get_execution_options().get("include_deleted", False),
-            "ignore_isolation": engine.get_execution_options().get("ignore_isolation", False),
-        }
-    )
-
-    # Register event listeners on this specific factory
-    return register_accounting_events(factory)
+    return _accounting_session_factory(bind=engine, info=_session_info(engine))
+
+# The factory used by get_session. It is not bound to an engine, the engine and its
+# current execution options are passed in for each session instead.
+_SESSION_FACTORY = _accounting_session_factory()
 
 def get_session(engine) -> Session:
     """
@@ -73,5 +78,4 @@ def get_session(engine) -> Session:
     Returns:
         AccountingSession.
     """
-    session_factory = get_session_factory(engine)
-    return session_factory()
+    return _SESSION_FACTORY(bind=engine, info=_session_info(engine))
@@ -13,6 +13,7 @@ import hashlib
 from datetime import datetime
 from copy import deepcopy
 from decimal import Decimal
+from typing import Optional
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import String, ForeignKey, Enum, select
 from sqlalchemy.types import DECIMAL
@@ -112,7 +113,6 @@ class Ledger(  # pylint: disable=too-many-instance-attributes
             folios.pop(0)
 
         session.add(ledger)
-        session.commit()
 
         return Ledger._allocate_amount(
             session, post, amount, posts, folios, transaction, entry_type
@@ -154,6 +154,7 @@ class Ledger(  # pylint: disable=too-many-instance-attributes
             transaction,
             Balance.BalanceType.CREDIT,
         )
+        session.commit()
 
     @staticmethod
     def _transaction_ledgers(transaction: Transaction) -> tuple:
@@ -200,11 +201,7 @@ class Ledger(  # pylint: disable=too-many-instance-attributes
                     line_item.tax.account_id
                 )
 
-                session.add(tax_post)
-                session.flush()
-
-                session.add(tax_folio)
-                session.flush()
+                session.add_all([tax_post, tax_folio])
 
             post.tax_id = folio.tax_id = line_item.tax_id
             post.amount = folio.amount = amount
@@ -212,11 +209,11 @@ class Ledger(  # pylint: disable=too-many-instance-attributes
             post.post_account_id = folio.folio_account_id = transaction.account_id
             post.folio_account_id = folio.post_account_id = line_item.account_id
 
-            session.add(post)
-            session.flush()
+            session.add_all([post, folio])
 
-            session.add(folio)
-            session.commit()
+        # The Ledgers are inserted in the order they were added, so the hash chain
+        # is the same as when each one is flushed on its own
+        session.commit()
 
     @staticmethod
     def post(session, transaction: Transaction) -> None:
@@ -232,20 +229,24 @@ class Ledger(  # pylint: disable=too-many-instance-attributes
         else:
             Ledger._post_simple(session, transaction)
 
-    def get_hash(self, connection) -> None:
+    def get_hash(self, connection, last_hash: Optional[str] = None) -> str:
         """
         Calculate the hash of the Ledger.
 
         Args:
             connection (Connection): The database connection of the accounting session
             to which the Ledger belongs.
+            last_hash (`str`, optional): The hash of the preceding Ledger, if it has
+                not yet been written to the database.
 
         Returns:
-            None
+            str: The hex digest of the Ledger's contents.
         """
-        last = connection.execute(
-            select(Ledger).where(Ledger.id == self.id - 1)
-        ).fetchone()
+        if last_hash is None:
+            last = connection.execute(
+                select(Ledger).where(Ledger.id == self.id - 1)
+            ).fetchone()
+            last_hash = last.hash if last else config.hashing["salt"]
 
         return getattr(hashlib, config.hashing["algorithm"])(
             ",".join(
@@ -256,7 +257,7 @@ class Ledger(  # pylint: disable=too-many-instance-attributes
                             self.transaction_date.replace(microsecond=0),
                             self.entry_type,
                             round(Decimal(self.amount), 4).normalize(),
-                            last.hash if last else config.hashing["salt"],
+                            last_hash,
                             self.entity_id,
                             self.transaction_id,
                             self.currency_id,
@@ -3,6 +3,7 @@ from datetime import datetime
 from decimal import Decimal
 from dateutil.relativedelta import relativedelta
 from sqlalchemy import select
+from python_accounting.database.session import get_session
 from python_accounting.models import (
     Account,
     Category,
@@ -13,6 +14,7 @@ from python_accounting.models import (
     LineItem,
     Tax,
     Assignment,
+    Currency,
 )
 from python_accounting.transactions import (
     ClientInvoice,
@@ -161,6 +163,40 @@ def test_account_validation(session, entity, currency):
     )
 
 
+def test_account_codes(session, entity, currency):
+    """Tests the numbering of account codes for accounts added together"""
+    accounts = [
+        Account(
+            name=f"test account {n}",
+            account_type=account_type,
+            currency_id=currency.id,
+            entity_id=entity.id,
+        )
+        for n, account_type in enumerate(
+            [
+                Account.AccountType.BANK,
+                Account.AccountType.RECEIVABLE,
+                Account.AccountType.BANK,
+            ]
+        )
+    ]
+    session.add_all(accounts)
+    session.flush()
+
+    assert [a.account_code for a in accounts] == [3001, 50001, 3002]
+
+    account = Account(
+        name="test account three",
+        account_type=Account.AccountType.BANK,
+        currency_id=currency.id,
+        entity_id=entity.id,
+    )
+    session.add(account)
+    session.flush()
+
+    assert account.account_code == 3003
+
+
 def test_account_isolation(session, entity, currency):
     """Tests the isolation of account objects by entity"""
 
@@ -210,6 +246,44 @@ def test_account_isolation(session, entity, currency):
     assert account1 == None
 
 
+def test_account_relationship_filtering(engine, session, entity, currency):
+    """Tests that related objects are filtered like the account they belong to"""
+    entity2 = Entity(name="Test Entity Two")
+    session.add(entity2)
+    session.flush()
+    session.entity = session.get(Entity, entity2.id)
+
+    currency2 = Currency(name="Euros", code="EUR", entity_id=entity2.id)
+    session.add(currency2)
+    session.flush()
+    account2 = Account(
+        name="test account two",
+        account_type=Account.AccountType.BANK,
+        currency_id=currency2.id,
+        entity_id=entity2.id,
+    )
+    session.add(account2)
+    session.commit()
+
+    def account_currency(entity_id, **kwargs):
+        with get_session(engine) as new_session:
+            new_session.entity = new_session.get(Entity, entity_id)
+            return new_session.get(Account, account2.id, **kwargs).currency
+
+    assert account_currency(entity.id, ignore_isolation=True).code == "EUR"
+
+    currency2.deleted_at = datetime.now()
+    session.commit()
+
+    assert account_currency(entity2.id) is None
+    assert account_currency(entity2.id, include_deleted=True).code == "EUR"
+    assert account_currency(entity.id, ignore_isolation=True) is None
+    assert (
+        account_currency(entity.id, ignore_isolation=True, include_deleted=True).code
+        == "EUR"
+    )
+
+
 def test_account_recycling(session, entity, currency):
     """Tests the deleting, restoring and destroying functions of the account model"""
 
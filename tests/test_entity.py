@@ -2,6 +2,7 @@ import pytest
 from datetime import datetime
 from sqlalchemy import select
 from python_accounting.models import Entity, Currency, User
+from python_accounting.database.session import get_session
 from python_accounting.exceptions import MissingEntityError, SessionEntityError
 
 
@@ -38,6 +39,21 @@ def test_entity_reporting_period_and_users(session, entity):
     assert entity.users[0] == user
 
 
+def test_entity_relationships_fresh_session(engine, session, entity):
+    """Tests loading an entity's relationships before the session entity is set"""
+    currency = Currency(name="US Dollars", code="USD", entity_id=entity.id)
+    session.add(currency)
+    session.flush()
+    entity.currency_id = currency.id
+    session.commit()
+
+    with get_session(engine) as fresh_session:
+        fresh_entity = fresh_session.get(Entity, entity.id)
+        assert fresh_session.entity is None
+        assert fresh_entity.reporting_period.calendar_year == datetime.today().year
+        assert fresh_entity.currency.code == "USD"
+
+
 def test_entity_isolation(session, entity):
     """Tests the isolation of accounting objects by entity"""
 
@@ -2,6 +2,7 @@ from datetime import datetime
 from python_accounting.models import (
     Ledger,
     Account,
+    Balance,
     Transaction,
     LineItem,
 )
@@ -55,3 +56,56 @@ def test_ledger_entity(session, entity, currency):
     assert ledger.post_account.name == "Test Ledger Account"
     assert ledger.folio_account.name == "Test Line Item Account"
     assert ledger.line_item.amount == 10
+
+
+def test_ledger_hash(session, entity, currency):
+    """Tests the hashes of ledgers posted in a single flush"""
+
+    account1 = Account(
+        name="test ledger account",
+        account_type=Account.AccountType.OPERATING_REVENUE,
+        currency_id=currency.id,
+        entity_id=entity.id,
+    )
+    account2 = Account(
+        name="test line item account",
+        account_type=Account.AccountType.RECEIVABLE,
+        currency_id=currency.id,
+        entity_id=entity.id,
+    )
+    session.add_all([account1, account2])
+    session.flush()
+
+    transaction = Transaction(
+        narration="Test transaction one",
+        transaction_date=datetime.now(),
+        account_id=account1.id,
+        transaction_type=Transaction.TransactionType.JOURNAL_ENTRY,
+        entity_id=entity.id,
+    )
+    session.add(transaction)
+    session.flush()
+
+    ledgers = [
+        Ledger(
+            transaction_id=transaction.id,
+            currency_id=currency.id,
+            transaction_date=transaction.transaction_date,
+            entity_id=entity.id,
+            entry_type=entry_type,
+            post_account_id=post.id,
+            folio_account_id=folio.id,
+            amount=10,
+        )
+        for entry_type, post, folio in [
+            (Balance.BalanceType.DEBIT, account1, account2),
+            (Balance.BalanceType.CREDIT, account2, account1),
+        ]
+    ]
+    session.add_all(ledgers)
+    session.commit()
+
+    connection = session.connection()
+    for ledger in ledgers:
+        assert ledger.hash is not None
+        assert ledger.hash == ledger.get_hash(connection)
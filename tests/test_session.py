@@ -0,0 +1,27 @@
+from python_accounting.models import Entity, Currency
+from python_accounting.database.session import get_session
+
+
+def test_session_engine_options(engine, session, entity, currency):
+    """Tests that sessions follow the current execution options of their engine"""
+    entity2 = Entity(name="Test Entity Two")
+    session.add(entity2)
+    session.flush()
+    session.entity = session.get(Entity, entity2.id)
+
+    currency2 = Currency(name="Euros", code="EUR", entity_id=entity2.id)
+    session.add(currency2)
+    session.commit()
+
+    with get_session(engine) as new_session:
+        new_session.entity = new_session.get(Entity, entity.id)
+        assert new_session.info["ignore_isolation"] is False
+        assert new_session.get(Currency, currency2.id) is None
+
+    engine.update_execution_options(ignore_isolation=True, include_deleted=True)
+
+    with get_session(engine) as new_session:
+        new_session.entity = new_session.get(Entity, entity.id)
+        assert new_session.info["ignore_isolation"] is True
+        assert new_session.info["include_deleted"] is True
+        assert new_session.get(Currency, currency2.id).code == "EUR"